@@ -1 +1,14 @@
-from .api import app
+"""
+    The engine (node, common and the games) only needs NumPy. The web
+    server lives in `api`, and is only imported when something asks for
+    `mcts.app`, e.g. `uvicorn mcts:app`, or runs `python -m mcts.server`.
+"""
+from typing import Any
+
+
+def __getattr__(name: str) -> Any:
+    if name == "app":
+        from .api import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -16,8 +16,11 @@ from fastapi.staticfiles import StaticFiles
 
 from . import tictactoe
 from . import connect4
+from . import mnk
 from .common import Player, Result
-from .node import Node, mcts
+from .node import Node
+from .clock import Clock
+from .distributed import Coordinator, NoResults
 
 app = FastAPI()
 
@@ -79,9 +82,14 @@ def handle(name: str):
 
 
 class TicTacToeGame:
+    codec_name = "tictactoe"
+
     def __init__(self) -> None:
 
         self.node = Node(tictactoe.State())
+        self.rng = random.Random()
+        # used to be a flat second for each of our (at most) four moves
+        self.clock = Clock(total=4, moves=4, branching=5, fixed=1)
 
     def __json__(self):
         state = self.node.state
@@ -95,19 +103,27 @@ class TicTacToeGame:
             ],
             "name": "tictactoe",
             "size": tictactoe.SIZE,
+            "move": "tictactoe_move",
+            "clock": self.clock,
         }
 
 
 #
 class Connect4Game:
+    codec_name = "connect4"
+
     def __init__(self) -> None:
         self.node = Node(connect4.State())
+        self.rng = random.Random()
+        # used to be a flat 1.5 seconds for each of our (at most) 21 moves
+        self.clock = Clock(total=1.5 * 21, moves=21, branching=7, fixed=1.5)
 
     def __json__(self):
         return {
             "player": self.node.state.player,
             "result": self.node.state.result,
             "name": "connect4",
+            "clock": self.clock,
             "board": [
                 [{0: "empty", -1: "X", +1: "O"}[cell] for cell in row]
                 for row in self.node.state._m
@@ -115,21 +131,64 @@ class Connect4Game:
         }
 
 
+class MNKGame:
+    def __init__(self, game: mnk.Game) -> None:
+        self.game = game
+        self.codec_name = f"mnk:{game.name}"
+        self.node = Node(mnk.State(game))
+        self.rng = random.Random()
+        moves = game.rows * game.cols // 2
+        self.clock = Clock(
+            total=2 * moves,
+            moves=moves,
+            branching=game.cols if game.gravity else moves,
+            fixed=2,
+        )
+
+    def __json__(self):
+        state = self.node.state
+        return {
+            "player": state.player,
+            "result": state.result,
+            "board": [
+                [{0: "empty", -1: "X", +1: "O"}[cell] for cell in row]
+                for row in state._m
+            ],
+            "name": self.game.name,
+            "size": self.game.cols,
+            "gravity": self.game.gravity,
+            "move": "mnk_move",
+            "clock": self.clock,
+        }
+
+
 # Not even trying to sort out multiplayer, persistent state
 # etc yet. That'll come later
-current_game: Union[TicTacToeGame, Connect4Game, None] = None
+current_game: Union[TicTacToeGame, Connect4Game, MNKGame, None] = None
+
+# Set this to a distributed.Coordinator to spread each search across
+# its workers, e.g. distributed.loopback(4) to try it out in-process
+search_backend: Optional[Coordinator] = None
 
 # current_node:Optional[Node]=None
 
 
+# The mnk variants the frontend can draw. TicTacToeBoard handles square,
+# free placement boards; there's no board for the other variants yet.
+MNK_BOARDS = ("gomoku",)
+
+
 @handle("new_game")
 async def handle_new_game(ws: WebSocket, what: str):
     global current_game
-    assert what in ("tictactoe", "connect4")
     if what == "tictactoe":
         current_game = TicTacToeGame()
-    else:
+    elif what == "connect4":
         current_game = Connect4Game()
+    elif what in MNK_BOARDS:
+        current_game = MNKGame(mnk.GAMES[what])
+    else:
+        raise ValueError(f"no such game: {what}")
 
     await ractive_set(ws, "current_game", current_game)
 
@@ -138,7 +197,9 @@ def apply_command(node: Node, command: Any) -> Node:
     if command in node.children:
         return node.children[command]
     else:
-        return Node(node.state.apply(command))
+        return Node(
+            node.state.apply(command), symmetric=node.symmetric, codec=node.codec
+        )
 
 
 @handle("connect4_move")
@@ -160,7 +221,7 @@ async def handle_connect4_move(ws: WebSocket, column: int) -> None:
 
     await ractive_set(ws, "current_game", game)
     if game.node.state.result == Result.INPROGRESS:
-        task = asyncio.create_task(pick_move(ws, game, 1.5))
+        task = asyncio.create_task(pick_move(ws, game))
 
 
 @handle("tictactoe_move")
@@ -180,11 +241,34 @@ async def handle_tictactoe_move(ws: WebSocket, j: int, i: int) -> None:
     await ractive_set(ws, "current_game", game)
 
     if game.node.state.result == Result.INPROGRESS:
-        task = asyncio.create_task(pick_move(ws, game, 1))
+        task = asyncio.create_task(pick_move(ws, game))
+
+
+@handle("mnk_move")
+async def handle_mnk_move(ws: WebSocket, *coords: int) -> None:
+    game = current_game
+
+    if not isinstance(game, MNKGame):
+        return
+
+    if game.node.state.result != Result.INPROGRESS:
+        return
+
+    if game.node.state.player != Player.ONE:
+        return
+    command = game.game.command(*coords)
+    if command not in game.node.state.commands:
+        return
+
+    game.node = apply_command(game.node, command)
+
+    await ractive_set(ws, "current_game", game)
+    if game.node.state.result == Result.INPROGRESS:
+        task = asyncio.create_task(pick_move(ws, game))
 
 
 async def pick_move(
-    ws: WebSocket, game: Union[TicTacToeGame, Connect4Game], seconds: int
+    ws: WebSocket, game: Union[TicTacToeGame, Connect4Game, MNKGame]
 ) -> Any:
 
     if game is None:
@@ -192,13 +276,27 @@ async def pick_move(
     if game != current_game:
         return None
 
-    end = time.time() + seconds
     # very little thread safety here!
     #print(f"Before thinking: {game.node}")
 
     def think() -> None:
-        while time.time() < end:
-            mcts(game.node)
+        backend = search_backend
+        budget = game.clock.allocate(game.node)
+        if backend is None or budget == 0.0:
+            game.clock.search(game.node, game.rng)
+            return
+
+        start = time.monotonic()
+        try:
+            backend.search(game.node, game.codec_name, budget)
+        except NoResults as e:
+            print(f"distributed search failed, searching locally: {e}")
+            # whatever is left of this move's time, with the wait charged
+            game.clock.search(
+                game.node, game.rng, budget=budget, spent=time.monotonic() - start
+            )
+            return
+        game.clock.spend(budget, time.monotonic() - start)
 
     loop = asyncio.get_running_loop()
     await loop.run_in_executor(None, think)
@@ -206,16 +304,20 @@ async def pick_move(
 
     #print(f"{game.node.playouts} positions examined")
     print(game.node)
-    # print(game.node.best_line())
-    best = game.node.best()
+    report = game.node.report()
 
-    game.node = apply_command(game.node, best)
+    game.node = apply_command(game.node, report.command)
 
-    # print(f"I think I have roughly a {round(100*game.node.ratio)} % chance of winning now")
-    # 
-    print("best line:", ",".join(repr(command) for command in game.node.best_line()))
+    print(
+        f"best line: {','.join(repr(command) for command in report.line)}"
+        f" ({round(100 * report.share)}% of playouts,"
+        f" win rate {report.win_rate:.2f}, {report.low:.2f}-{report.high:.2f})"
+    )
     
     
+    if game.node.state.result != Result.INPROGRESS:
+        print(game.clock)
+
     await ractive_set(ws, "current_game", game)
 
 
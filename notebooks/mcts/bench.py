@@ -0,0 +1,270 @@
+"""
+    Rough benchmarks. Run with
+
+        python -m mcts.bench
+"""
+import functools
+import time
+import random
+import subprocess
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from .node import Node, mcts, Codec, CachedCodec
+from .clock import Clock
+from . import distributed
+from .common import Result
+from .rng import RNG, make_rng
+from . import tictactoe
+from . import connect4
+from . import mnk
+
+
+def iterations_per_second(
+    make_state: Callable[[], Any], seconds: float, rng: RNG = random
+) -> float:
+    "How many full select/expand/playout/backprop rounds we get through"
+    root = Node(make_state())
+    count = 0
+    start = time.perf_counter()
+    end = start + seconds
+    while time.perf_counter() < end:
+        mcts(root, rng)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def bench_board_sizes(seconds: float = 1.0) -> Dict[str, float]:
+    "MCTS throughput as the board gets bigger"
+    makers: Dict[str, Callable[[], Any]] = {
+        "tictactoe (original)": tictactoe.State,
+        "connect4 (original)": connect4.State,
+    }
+    for name, game in mnk.GAMES.items():
+        cells = game.rows * game.cols
+        label = f"{name} {game.rows}x{game.cols} k={game.k} ({cells} cells)"
+        makers[label] = functools.partial(mnk.State, game)
+
+    return {
+        label: iterations_per_second(make, seconds) for label, make in makers.items()
+    }
+
+
+def count_nodes(node: Node) -> int:
+    return 1 + sum(count_nodes(child) for child in node.children.values())
+
+
+def nodes_to_solve(
+    make_state: Callable[[], Any],
+    correct: Callable[[Any], bool],
+    symmetric: bool,
+    budgets: Sequence[int] = (50, 100, 200, 400, 800, 1600),
+    seeds: int = 10,
+    threshold: float = 0.9,
+) -> Optional[int]:
+    """
+    The average tree size at the smallest playout budget where at least
+    `threshold` of the seeded searches pick a correct move.
+    """
+    for budget in budgets:
+        hits = 0
+        nodes = 0
+        for seed in range(seeds):
+            rng = make_rng(seed)
+            root = Node(make_state(), symmetric=symmetric)
+            for _ in range(budget):
+                mcts(root, rng)
+            hits += correct(root.best())
+            nodes += count_nodes(root)
+        if hits >= threshold * seeds:
+            return nodes // seeds
+    return None
+
+
+def tictactoe_block() -> tictactoe.State:
+    "X in opposite corners, O in the middle. O has to take an edge or lose."
+    state = tictactoe.State()
+    for j, i in ((0, 0), (1, 1), (2, 2)):
+        state = state.apply(tictactoe.Command(j, i))
+    return state
+
+
+def bench_symmetry() -> Dict[str, Dict[bool, Optional[int]]]:
+    "Tree size needed to find the right move, with and without symmetry"
+    problems: Dict[str, Any] = {
+        "tictactoe, defend the corners": (
+            tictactoe_block,
+            lambda command: (command.j + command.i) % 2 == 1,
+        ),
+        "connect4, opening move": (
+            lambda: mnk.State(mnk.CONNECT4),
+            lambda command: command.column == 3,
+        ),
+    }
+    return {
+        label: {
+            symmetric: nodes_to_solve(make, correct, symmetric)
+            for symmetric in (False, True)
+        }
+        for label, (make, correct) in problems.items()
+    }
+
+
+def bench_rng(seconds: float = 1.0) -> Dict[str, float]:
+    """
+    Connect 4 throughput with each source of random numbers, relative
+    to random.Random, which is what the server and workers use
+    """
+    make = lambda: mnk.State(mnk.CONNECT4)
+    rates = {
+        "random.Random": iterations_per_second(make, seconds, make_rng(1)),
+        "random module": iterations_per_second(make, seconds),
+        "BlockRNG": iterations_per_second(make, seconds, make_rng(1, numpy=True)),
+    }
+    baseline = rates["random.Random"]
+    return {label: rate / baseline for label, rate in rates.items()}
+
+
+def bench_clock(seed: int = 12345) -> Dict[str, Clock]:
+    """
+    Self-play games where each side has a clock sized like the web
+    server's old fixed think times, to see how much of it goes unused.
+    """
+    games: Dict[str, Any] = {
+        "tictactoe": (tictactoe.State, lambda: Clock(total=4, moves=4, branching=5, fixed=1)),
+        "connect4": (
+            lambda: mnk.State(mnk.CONNECT4),
+            lambda: Clock(total=1.5 * 21, moves=21, branching=7, fixed=1.5),
+        ),
+    }
+    clocks = {}
+    for name, (make_state, make_clock) in games.items():
+        rng = make_rng(seed)
+        sides = [make_clock(), make_clock()]
+        node = Node(make_state())
+        turn = 0
+        while node.state.result == Result.INPROGRESS:
+            sides[turn % 2].search(node, rng)
+            node = node.children[node.best()]
+            turn += 1
+        clocks[f"{name}, first player"] = sides[0]
+        clocks[f"{name}, second player"] = sides[1]
+    return clocks
+
+
+def bytes_per_node(playouts: int, codec: Optional[Codec], seed: int = 12345) -> float:
+    "Memory held by a Connect 4 search tree (and any cache), per node"
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    root = Node(connect4.State(), codec=codec)
+    rng = make_rng(seed)
+    for _ in range(playouts):
+        mcts(root, rng)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / count_nodes(root)
+
+
+def bench_memory(seconds: float = 1.5) -> Dict[str, float]:
+    """
+    Bytes per node for a Connect 4 search as long as the server's old
+    1.5 second think. We count how many playouts that is first, because
+    tracing allocations slows the search down.
+    """
+    root = Node(connect4.State())
+    rng = make_rng(12345)
+    playouts = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        mcts(root, rng)
+        playouts += 1
+
+    return {
+        f"full states ({playouts} playouts)": bytes_per_node(playouts, None),
+        "packed keys": bytes_per_node(playouts, connect4.CODEC),
+        "packed keys, 256 state LRU cache": bytes_per_node(
+            playouts, CachedCodec(connect4.CODEC, 256)
+        ),
+    }
+
+
+def bench_distributed(seconds: float = 1.0) -> Dict[str, int]:
+    """
+    Root playouts from one Connect 4 search spread over loopback workers.
+    They all share this process (and its GIL), so this measures protocol
+    overhead rather than speedup.
+    """
+    playouts = {}
+    for workers in (1, 2, 4):
+        root = Node(mnk.State(mnk.CONNECT4))
+        with distributed.loopback(workers, seed=12345) as coordinator:
+            merged = coordinator.search(root, "mnk:connect4", seconds)
+        playouts[f"{workers} loopback workers"] = merged.playouts
+    return playouts
+
+
+CORE_MODULES = ("mcts.node", "mcts.common", "mcts.tictactoe", "mcts.connect4", "mcts.mnk")
+
+# nothing on the engine's import path should pull these in
+WEB_MODULES = ("fastapi", "starlette", "uvicorn")
+
+
+def bench_import(runs: int = 5) -> float:
+    """
+    Best wall-clock time, in seconds, to import the engine in a fresh
+    interpreter. Fails if the web stack gets imported along the way.
+    """
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {', '.join(CORE_MODULES)}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(elapsed, *[m for m in {WEB_MODULES!r} if m in sys.modules])\n"
+    )
+    best = float("inf")
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        elapsed, loaded = float(output[0]), output[1:]
+        assert not loaded, f"importing the engine loaded {loaded}"
+        best = min(best, elapsed)
+    return best
+
+
+def main() -> None:
+    print(f"engine import time: {1000 * bench_import():.1f}ms")
+
+    random.seed(12345)
+
+    print("mcts iterations per second:")
+    for label, rate in bench_board_sizes().items():
+        print(f"    {label:<40} {rate:10.0f}")
+
+    print("connect4 speed by random number source, against random.Random:")
+    for label, ratio in bench_rng().items():
+        print(f"    {label:<40} {ratio:10.2f}")
+
+    print("self-play with adaptive time management:")
+    for label, clock in bench_clock().items():
+        print(f"    {label:<40} {clock}")
+
+    print("connect4 bytes per node:")
+    for label, size in bench_memory().items():
+        print(f"    {label:<40} {size:10.0f}")
+
+    print("connect4 playouts in one second, distributed:")
+    for label, count in bench_distributed().items():
+        print(f"    {label:<40} {count:10}")
+
+    print("nodes needed to find the right move (plain / symmetric):")
+    for label, sizes in bench_symmetry().items():
+        print(f"    {label:<40} {sizes[False]} / {sizes[True]}")
+
+
+if __name__ == "__main__":
+    main()
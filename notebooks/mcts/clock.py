@@ -0,0 +1,158 @@
+"""
+    Time management: share a per-game budget out across the computer's
+    moves instead of thinking for a fixed time on every move.
+"""
+import time
+import random
+from typing import Any, Dict, Optional, Tuple
+
+from .node import Node, mcts
+from .rng import RNG
+
+
+def _top_two(node: Node) -> Tuple[int, int]:
+    "Visit counts of the two most visited children"
+    visits = sorted((child.playouts for child in list(node.children.values())), reverse=True)
+    visits += [0, 0]
+    return visits[0], visits[1]
+
+
+class Clock:
+    """
+    `total` seconds to spend over the whole game, which we expect to take
+    roughly `moves` more moves of ours, with about `branching` commands to
+    choose from on a typical move. `fixed` is the flat think time per move
+    that the clock replaces, which is what we measure savings against.
+
+    Each move gets an even share of what's left, scaled by how many commands
+    there are to choose between. We answer forced moves straight away, stop
+    as soon as the most visited child can't be caught, and think for up to
+    `extension` times longer if the top two children are within `closeness`
+    of each other when time runs out.
+    """
+
+    def __init__(
+        self,
+        total: float,
+        moves: int,
+        branching: float,
+        fixed: float,
+        minimum: float = 0.05,
+        extension: float = 0.5,
+        closeness: float = 0.1,
+        check_every: float = 0.02,
+    ) -> None:
+        self.total = total
+        self.moves = moves
+        self.branching = branching
+        self.fixed = fixed
+        self.minimum = minimum
+        self.extension = extension
+        self.closeness = closeness
+        self.check_every = check_every
+
+        self.moves_made = 0
+        self.used = 0.0
+        # how much less time each move took than the old fixed think time
+        self.saved = 0.0
+        # and than its own allocation, which goes negative when we extend
+        self.under_allocation = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"Clock(used={self.used:.2f}s of {self.total:.2f}s,"
+            f" saved={self.saved:.2f}s against {self.fixed}s a move,"
+            f" {self.under_allocation:.2f}s under allocation,"
+            f" over {self.moves_made} moves)"
+        )
+
+    def __json__(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "used": self.used,
+            "saved": self.saved,
+            "under_allocation": self.under_allocation,
+            "moves": self.moves_made,
+        }
+
+    @property
+    def remaining(self) -> float:
+        return max(self.total - self.used, 0.0)
+
+    def allocate(self, root: Node) -> float:
+        "Seconds to spend on the move from this node"
+        branching = root.n_commands
+        if branching <= 1:
+            return 0.0
+
+        moves_left = max(self.moves - self.moves_made, 1)
+        weight = min(max(branching / self.branching, 0.5), 2.0)
+        share = self.remaining / moves_left * weight
+
+        # never bet more than half of what's left on one move
+        return max(min(share, self.remaining / 2), self.minimum)
+
+    def search(
+        self,
+        root: Node,
+        rng: RNG = random,
+        budget: Optional[float] = None,
+        spent: float = 0.0,
+    ) -> float:
+        """
+        Search from `root` until this move's time is up, returning the number
+        of seconds used. Afterwards root.best() / root.report() give the move.
+
+        A caller that has already used `spent` seconds of this move's
+        `budget` elsewhere (see api.pick_move) can finish the move here,
+        and the whole move gets charged to the clock.
+        """
+        start = time.monotonic()
+        if budget is None:
+            budget = self.allocate(root)
+        remaining = budget - spent
+
+        if remaining <= 0.0:
+            # forced, or out of time: one playout is enough to give the
+            # root a child
+            mcts(root, rng)
+        else:
+            deadline = start + remaining
+            extended = False
+            next_check = start + self.check_every
+            searched = 0
+            while True:
+                mcts(root, rng)
+                searched += 1
+
+                now = time.monotonic()
+                if now < next_check:
+                    continue
+                next_check = now + self.check_every
+
+                first, second = _top_two(root)
+
+                if now >= deadline:
+                    close = second >= (1 - self.closeness) * first
+                    if close and not extended and self.extension > 0:
+                        deadline += budget * self.extension
+                        extended = True
+                        continue
+                    break
+
+                # Even if every remaining playout went to the runner up,
+                # it couldn't catch the leader.
+                rate = searched / (now - start)
+                if first - second > rate * (deadline - now):
+                    break
+
+        elapsed = spent + time.monotonic() - start
+        self.spend(budget, elapsed)
+        return elapsed
+
+    def spend(self, budget: float, elapsed: float) -> None:
+        "Record a move that was allocated `budget` seconds and took `elapsed`"
+        self.moves_made += 1
+        self.used += elapsed
+        self.saved += self.fixed - elapsed
+        self.under_allocation += budget - elapsed
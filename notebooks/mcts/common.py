@@ -1,4 +1,6 @@
 from enum import Enum
+from typing import Any, Callable, Tuple
+import numpy as np
 
 # maybe this should be win/draw/inprogress, with a separate
 # winner field that can be none?
@@ -30,3 +32,47 @@ class Illegal(Exception):
 
 class GameOver(Exception):
     pass
+
+
+class BoardCodec:
+    """
+    Packs a board of -1/0/+1 cells, and whose turn it is, into a single
+    int: one bit per cell for each player's pieces, plus a bit for the
+    player. A 6x7 board fits in 85 bits, which is a lot smaller than a
+    State with its own array and command list.
+
+    `make_state(m, player)` builds a state back from a board.
+    """
+
+    def __init__(
+        self,
+        shape: Tuple[int, int],
+        make_state: Callable[[np.ndarray, Player], Any],
+        dtype: Any = int,
+    ) -> None:
+        self.shape = shape
+        self.make_state = make_state
+        self.dtype = dtype
+        self.cells = shape[0] * shape[1]
+        self.nbytes = (self.cells + 7) // 8
+
+    def _pack(self, plane: np.ndarray) -> int:
+        return int.from_bytes(np.packbits(plane, bitorder="little").tobytes(), "little")
+
+    def _unpack(self, bits: int) -> np.ndarray:
+        packed = np.frombuffer(bits.to_bytes(self.nbytes, "little"), dtype=np.uint8)
+        return np.unpackbits(packed, count=self.cells, bitorder="little")
+
+    def encode(self, state: Any) -> int:
+        flat = state._m.reshape(-1)
+        ones = self._pack(flat == 1)
+        twos = self._pack(flat == -1)
+        return (((ones << self.cells) | twos) << 1) | (state.player == Player.TWO)
+
+    def decode(self, key: int) -> Any:
+        player = Player.TWO if key & 1 else Player.ONE
+        key >>= 1
+        mask = (1 << self.cells) - 1
+        m = self._unpack(key >> self.cells).astype(self.dtype)
+        m -= self._unpack(key & mask)
+        return self.make_state(m.reshape(self.shape), player)
@@ -1,7 +1,6 @@
-from typing import Optional
-from dataclasses import dataclass
+from typing import Any, Optional, List, Dict, Tuple
 import numpy as np
-from .common import Result, Player, other_player, GameOver, Illegal
+from .common import Result, Player, other_player, GameOver, Illegal, BoardCodec
 
 
 def default_m() -> np.ndarray:
@@ -54,18 +53,54 @@ def _result(m)->Result:
     return Result.INPROGRESS
 
 
-@dataclass(frozen=True)
 class Command:
+    """
+    There is exactly one Command per column, built when the module loads.
+    Command(column) hands back that shared instance, so hashing and
+    comparison are by identity.
+    """
+
+    __slots__ = ("column",)
+
     column: int
 
-    def __post_init__(self) -> None:
-        assert 0 <= self.column <= 6, "column must be between 0 and 6"
+    def __new__(cls, column: int) -> "Command":
+        # an explicit check, because a negative index would quietly
+        # give us some other column
+        try:
+            if not 0 <= column <= 6:
+                raise Illegal("column must be between 0 and 6")
+            return COMMANDS[column]
+        except TypeError:
+            raise Illegal("column must be an integer")
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # every state in the process shares these
+        raise AttributeError("commands can't be changed")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("commands can't be changed")
+
+    def __reduce__(self) -> Tuple:
+        return (Command, (self.column,))
 
     def __repr__(self) -> str:
         return f"{self.column}"
 
+    def __json__(self) -> Dict[str, int]:
+        return {"column": self.column}
+
+
+def _intern(column: int) -> Command:
+    command = object.__new__(Command)
+    object.__setattr__(command, "column", column)
+    return command
+
+
+COMMANDS: List[Command] = [_intern(column) for column in range(7)]
+
+MIRROR = {COMMANDS[i]: COMMANDS[6 - i] for i in range(7)}
 
- 
 
 class State:
     def __init__(self, m: Optional[np.ndarray] = None, player: Optional[Player] = None):
@@ -83,12 +118,16 @@ class State:
         
         top_row = self._m[0]
         if self.result == Result.INPROGRESS:
-            self.commands = [
-                Command(i) for i, value in enumerate(top_row) if value == 0
-            ]
+            self.commands = [COMMANDS[i] for i in np.flatnonzero(top_row == 0)]
         else:
             self.commands = []
 
+    def symmetries(self) -> List[Dict[Command, Command]]:
+        "The board can only be mirrored left to right"
+        if (self._m == np.fliplr(self._m)).all():
+            return [MIRROR]
+        return []
+
     def __repr__(self) -> str:
         return f"""
             {self._m}
@@ -116,3 +155,6 @@ class State:
         col[j] = v
 
         return State(m, other_player(self.player))
+
+
+CODEC = BoardCodec((6, 7), State)
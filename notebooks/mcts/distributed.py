@@ -0,0 +1,321 @@
+"""
+    Spreading one move's search over several workers.
+
+    The coordinator sends each worker the root position (as a codec key)
+    and a time budget. Each worker runs its own independent search and
+    sends back the statistics for the root's children, which the
+    coordinator adds into its own root node. After that, root.best() and
+    root.report() work as usual.
+
+    Workers are reached through a Transport, which only moves bytes
+    around, so the messages are JSON from end to end. LoopbackTransport
+    runs a worker in a thread in this process, which is enough to try
+    the whole protocol without a network. A network transport only has
+    to get the bytes to a Worker.handle_wire on another host and back.
+"""
+import json
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Set
+
+import numpy as np
+
+from .node import Node, Codec, MCTSException, mcts
+from .common import Result
+from .rng import make_rng
+from . import tictactoe
+from . import connect4
+from . import mnk
+
+
+# How workers find the codec for a game, by name
+CODECS: Dict[str, Codec] = {
+    "tictactoe": tictactoe.CODEC,
+    "connect4": connect4.CODEC,
+    **{f"mnk:{name}": game.codec for name, game in mnk.GAMES.items()},
+}
+
+
+class NoResults(MCTSException):
+    "None of the workers sent back a usable result in time"
+
+
+@dataclass
+class SearchRequest:
+    id: str
+    game: str  # a key into CODECS
+    # The root state encoded with that codec, as a hex string. The keys
+    # can run to hundreds of bits, which not every JSON reader will take
+    # as a number.
+    key: str
+    seconds: float
+    seed: int
+    symmetric: bool = True
+    playouts: Optional[int] = None  # stop early after this many
+
+    def to_wire(self) -> bytes:
+        return json.dumps(asdict(self)).encode()
+
+    @classmethod
+    def from_wire(cls, data: bytes) -> "SearchRequest":
+        return cls(**json.loads(data))
+
+
+@dataclass
+class SearchResult:
+    id: str
+    worker: str
+    playouts: int = 0
+    wins: float = 0.0
+    # [index into the root state's commands, playouts, wins] per child
+    children: List[List] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_wire(self) -> bytes:
+        return json.dumps(asdict(self)).encode()
+
+    @classmethod
+    def from_wire(cls, data: bytes) -> "SearchResult":
+        return cls(**json.loads(data))
+
+
+class Worker:
+    "Runs searches on behalf of a coordinator"
+
+    def __init__(self, name: str, codecs: Dict[str, Codec] = CODECS) -> None:
+        self.name = name
+        self.codecs = codecs
+        # ids of the requests we're working on, and of those the
+        # coordinator has given up on
+        self._running: Set[str] = set()
+        self._cancelled: Set[str] = set()
+
+    def cancel(self, request_id: str) -> None:
+        "Stop working on a request as soon as possible"
+        if request_id in self._running:
+            self._cancelled.add(request_id)
+
+    def handle(self, request: SearchRequest) -> SearchResult:
+        self._running.add(request.id)
+        try:
+            return self._search(request)
+        finally:
+            self._running.discard(request.id)
+            self._cancelled.discard(request.id)
+
+    def _search(self, request: SearchRequest) -> SearchResult:
+        codec = self.codecs.get(request.game)
+        if codec is None:
+            return SearchResult(request.id, self.name, error=f"unknown game {request.game}")
+
+        state = codec.decode(int(request.key, 16))
+        if state.result != Result.INPROGRESS:
+            return SearchResult(request.id, self.name, error="game is over")
+
+        root: Node = Node(state, symmetric=request.symmetric)
+        rng = make_rng(request.seed)
+        limit = request.playouts
+        end = time.monotonic() + request.seconds
+        cancelled = self._cancelled
+        while time.monotonic() < end and (limit is None or root.playouts < limit):
+            if request.id in cancelled:
+                break
+            mcts(root, rng)
+
+        index = {command: i for i, command in enumerate(state.commands)}
+        return SearchResult(
+            request.id,
+            self.name,
+            playouts=root.playouts,
+            wins=root.wins,
+            children=[
+                [index[command], child.playouts, child.wins]
+                for command, child in root.children.items()
+            ],
+        )
+
+    def handle_wire(self, data: bytes) -> bytes:
+        return self.handle(SearchRequest.from_wire(data)).to_wire()
+
+
+class Transport(Protocol):
+    "Gets a request to a worker, and its answer back"
+
+    name: str
+
+    def send(self, request: bytes) -> "Future[bytes]":
+        ...
+
+    def cancel(self, request_id: str) -> None:
+        "Tell the worker we no longer want an answer to this request"
+        ...
+
+    def close(self) -> None:
+        "Give up on anything outstanding and release the connection"
+        ...
+
+
+class LoopbackTransport:
+    """
+    A worker on a thread of its own in this process. `latency` is added
+    before each answer, to stand in for a slow or distant host.
+
+    Call close() (or use it as a context manager) when you're done with
+    it, to stop its thread.
+    """
+
+    def __init__(self, worker: Worker, latency: float = 0.0) -> None:
+        self.worker = worker
+        self.name = worker.name
+        self.latency = latency
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix=f"worker-{worker.name}")
+
+    def _round_trip(self, request: bytes) -> bytes:
+        response = self.worker.handle_wire(request)
+        if self.latency:
+            time.sleep(self.latency)
+        return response
+
+    def send(self, request: bytes) -> "Future[bytes]":
+        return self.executor.submit(self._round_trip, request)
+
+    def cancel(self, request_id: str) -> None:
+        self.worker.cancel(request_id)
+
+    def close(self) -> None:
+        # drop whatever is queued first, so nothing new starts while we
+        # stop the search that's running
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for request_id in list(self.worker._running):
+            self.worker.cancel(request_id)
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self) -> "LoopbackTransport":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+@dataclass
+class Merged:
+    "What came back from one distributed search"
+
+    playouts: int = 0
+    workers: List[str] = field(default_factory=list)
+    timeouts: List[str] = field(default_factory=list)
+    failures: Dict[str, str] = field(default_factory=dict)
+
+
+def merge(root: Node, result: SearchResult) -> None:
+    "Add a worker's root statistics into our root node"
+    state = root.state
+    for index, playouts, wins in result.children:
+        if playouts == 0:
+            continue
+        command = state.commands[index]
+        child = root.children.get(command)
+        if child is None:
+            child = Node(
+                state.apply(command), symmetric=root.symmetric, codec=root.codec
+            )
+            root.children[command] = child
+            if root.untried is not None and command in root.untried:
+                root.untried.remove(command)
+                if not root.untried:
+                    root.untried = None
+        child.playouts += playouts
+        child.wins += wins
+    root.playouts += result.playouts
+    root.wins += result.wins
+
+
+class Coordinator:
+    """
+    Runs one search across all its transports. Results that haven't
+    arrived `grace` seconds after the search time is up are left out,
+    as are workers that report an error, and we go with what we have.
+    """
+
+    def __init__(
+        self,
+        transports: Sequence[Transport],
+        seed: Optional[int] = None,
+        grace: float = 0.25,
+    ) -> None:
+        assert transports, "need at least one transport"
+        self.transports = list(transports)
+        self.grace = grace
+        # spawn() hands out new children each time, so every search gets
+        # fresh, but still reproducible, seeds
+        self._seeds = np.random.SeedSequence(seed)
+
+    def search(
+        self, root: Node, game: str, seconds: float, playouts: Optional[int] = None
+    ) -> Merged:
+        assert root.state.result == Result.INPROGRESS
+        key = format(CODECS[game].encode(root.state), "x")
+        request_id = uuid.uuid4().hex
+
+        futures: Dict["Future[bytes]", Transport] = {}
+        for transport, seed in zip(self.transports, self._seeds.spawn(len(self.transports))):
+            request = SearchRequest(
+                id=request_id,
+                game=game,
+                key=key,
+                seconds=seconds,
+                seed=int(seed.generate_state(1, np.uint64)[0]),
+                symmetric=root.symmetric,
+                playouts=playouts,
+            )
+            futures[transport.send(request.to_wire())] = transport
+
+        done, not_done = wait(futures, timeout=seconds + self.grace)
+
+        # Don't leave stale searches tying the workers up: drop the ones
+        # still queued and ask the running ones to stop.
+        for future in not_done:
+            if not future.cancel():
+                futures[future].cancel(request_id)
+
+        merged = Merged(timeouts=sorted(futures[future].name for future in not_done))
+        # merge in a fixed order, so the tree doesn't depend on who finished first
+        for future in sorted(done, key=lambda future: futures[future].name):
+            name = futures[future].name
+            try:
+                result = SearchResult.from_wire(future.result())
+            except Exception as e:
+                merged.failures[name] = repr(e)
+                continue
+            if result.error is not None or result.id != request_id:
+                merged.failures[name] = result.error or "answer to a different request"
+                continue
+            merge(root, result)
+            merged.playouts += result.playouts
+            merged.workers.append(name)
+
+        if not merged.workers:
+            raise NoResults(f"timed out: {merged.timeouts}, failed: {merged.failures}")
+        return merged
+
+    def close(self) -> None:
+        "Close all the transports"
+        for transport in self.transports:
+            transport.close()
+
+    def __enter__(self) -> "Coordinator":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def loopback(workers: int, seed: Optional[int] = None, **kwargs) -> Coordinator:
+    "A coordinator with `workers` in-process workers"
+    return Coordinator(
+        [LoopbackTransport(Worker(f"loopback-{i}")) for i in range(workers)],
+        seed=seed,
+        **kwargs,
+    )
@@ -0,0 +1,257 @@
+"""
+    Generalised m,n,k games: k-in-a-row on a rows x cols board, with
+    either free placement (tictactoe, gomoku) or gravity (connect4 and
+    friends).
+
+    All the k-in-a-row windows are computed once per board size, and
+    each state only checks the windows that pass through the cell that
+    was just played, so win detection doesn't get slower as the board
+    gets bigger.
+"""
+from typing import Optional, List, Dict, Union, Callable, Tuple
+from dataclasses import dataclass
+import numpy as np
+
+from .common import Result, Player, other_player, GameOver, Illegal, BoardCodec
+
+
+# Commands are built once per Game and shared by all its states, so
+# they hash and compare by identity. Use Game.command() to look one up.
+
+
+@dataclass(frozen=True, eq=False)
+class Place:
+    "Put a piece on any empty cell"
+    j: int
+    i: int
+
+    def __repr__(self) -> str:
+        return f"({self.i},{self.j})"
+
+    def __json__(self) -> Dict[str, int]:
+        return {"i": self.i, "j": self.j}
+
+
+@dataclass(frozen=True, eq=False)
+class Drop:
+    "Drop a piece into a column, where it falls to the lowest empty cell"
+    column: int
+
+    def __repr__(self) -> str:
+        return f"{self.column}"
+
+    def __json__(self) -> Dict[str, int]:
+        return {"column": self.column}
+
+
+Command = Union[Place, Drop]
+
+# the four directions a line can run in: across, down, and both diagonals
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def winning_lines(rows: int, cols: int, k: int) -> np.ndarray:
+    "Every k-in-a-row window on the board, one per row, as flat cell indices"
+    lines = []
+    for dj, di in DIRECTIONS:
+        for j in range(rows):
+            for i in range(cols):
+                end_j, end_i = j + dj * (k - 1), i + di * (k - 1)
+                if 0 <= end_j < rows and 0 <= end_i < cols:
+                    lines.append([(j + dj * s) * cols + i + di * s for s in range(k)])
+    return np.array(lines, dtype=np.intp).reshape(-1, k)
+
+
+Transform = Callable[[np.ndarray], np.ndarray]
+
+
+def board_transforms(rows: int, cols: int, gravity: bool) -> List[Transform]:
+    "The non-trivial symmetries of the board that keep the rules the same"
+    if gravity:
+        # turning the board over would make pieces fall upwards
+        return [np.fliplr]
+    transforms: List[Transform] = [np.fliplr, np.flipud, lambda m: np.rot90(m, 2)]
+    if rows == cols:
+        transforms += [
+            lambda m: np.rot90(m, 1),
+            lambda m: np.rot90(m, 3),
+            np.transpose,
+            lambda m: np.rot90(m, 2).T,
+        ]
+    return transforms
+
+
+class Game:
+    """
+    The fixed rules of one m,n,k variant. These are shared by every state
+    of that variant, so the line tables and commands only get built once.
+    """
+
+    def __init__(
+        self, rows: int, cols: int, k: int, gravity: bool = False, name: str = ""
+    ) -> None:
+        assert rows > 0 and cols > 0
+        assert 0 < k <= max(rows, cols), "k must fit on the board"
+
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.gravity = gravity
+        self.name = name or f"{rows}x{cols}x{k}"
+
+        self.lines = winning_lines(rows, cols, k)
+
+        # For each cell, only the windows that pass through it.
+        self.cell_lines: List[np.ndarray] = [
+            self.lines[(self.lines == cell).any(axis=1)] for cell in range(rows * cols)
+        ]
+
+        self.drops = [Drop(i) for i in range(cols)]
+        self.places = [[Place(j, i) for i in range(cols)] for j in range(rows)]
+
+        # Each symmetry as a permutation of the flat board (cell `p` of the
+        # transformed board comes from cell `source[p]`), and where it sends
+        # each command.
+        self.symmetries: List[Tuple[np.ndarray, Dict[Command, Command]]] = []
+        for transform in board_transforms(rows, cols, gravity):
+            source = transform(np.arange(rows * cols).reshape(rows, cols)).reshape(-1)
+            mapping: Dict[Command, Command]
+            if gravity:
+                mapping = {
+                    self.drops[source[i] % cols]: self.drops[i]
+                    for i in range(cols)
+                }
+            else:
+                mapping = {
+                    self.places[src // cols][src % cols]: self.places[p // cols][p % cols]
+                    for p, src in enumerate(source.tolist())
+                }
+            self.symmetries.append((source, mapping))
+
+        self.codec = BoardCodec(
+            (rows, cols), lambda m, player: State(self, m, player), dtype=np.int8
+        )
+
+    def __repr__(self) -> str:
+        return f"Game({self.name})"
+
+    def command(self, *coords: int) -> Command:
+        "Build a command from a column (gravity) or a row and column (placement)"
+        try:
+            if self.gravity:
+                (column,) = coords
+                if not 0 <= column < self.cols:
+                    raise Illegal()
+                return self.drops[column]
+            j, i = coords
+            if not (0 <= j < self.rows and 0 <= i < self.cols):
+                raise Illegal()
+            return self.places[j][i]
+        except (TypeError, ValueError):
+            raise Illegal()
+
+
+def _result(game: Game, m: np.ndarray, last: Optional[int]) -> Result:
+    """
+    If we know which cell was just played we only need to look at the
+    lines through it, otherwise we check the whole board.
+    """
+    flat = m.reshape(-1)
+    lines = game.lines if last is None else game.cell_lines[last]
+
+    if len(lines):
+        sums = flat[lines].sum(axis=1)
+        if (sums == game.k).any():
+            return Result.PLAYER1
+        if (sums == -game.k).any():
+            return Result.PLAYER2
+
+    if not (flat == 0).any():
+        return Result.DRAW
+    return Result.INPROGRESS
+
+
+# State classes should be treated as immutable
+class State:
+    def __init__(
+        self,
+        game: Game,
+        m: Optional[np.ndarray] = None,
+        player: Optional[Player] = None,
+        last: Optional[int] = None,
+    ) -> None:
+        self.game = game
+
+        if m is None:
+            assert player is None
+            self.player = Player.ONE
+            self._m = np.zeros((game.rows, game.cols), dtype=np.int8)
+        else:
+            assert player is not None
+            assert m.shape == (game.rows, game.cols)
+            self._m = m
+            self.player = player
+
+        self.result = _result(game, self._m, last)
+
+        self.commands: List[Command]
+        if self.result != Result.INPROGRESS:
+            self.commands = []
+        elif game.gravity:
+            self.commands = [game.drops[i] for i in np.flatnonzero(self._m[0] == 0)]
+        else:
+            self.commands = [
+                game.places[j][i] for j, i in zip(*np.nonzero(self._m == 0))
+            ]
+
+    def symmetries(self) -> List[Dict[Command, Command]]:
+        "Command mappings for the symmetries that leave this board unchanged"
+        flat = self._m.reshape(-1)
+        return [
+            mapping
+            for source, mapping in self.game.symmetries
+            if (flat[source] == flat).all()
+        ]
+
+    def __repr__(self) -> str:
+        d = {0: ".", -1: "X", 1: "O"}
+        return (
+            "\n".join(" ".join(d[el] for el in line) for line in self._m)
+            + f"    player {self.player}"
+        )
+
+    def apply(self, command: Command) -> "State":
+        if self.result != Result.INPROGRESS:
+            raise GameOver()
+
+        if self.game.gravity:
+            if not isinstance(command, Drop) or not 0 <= command.column < self.game.cols:
+                raise Illegal()
+            column = command.column
+            if self._m[0, column] != 0:
+                raise Illegal()
+            # pieces stack up from the bottom, so the empty cells are all on top
+            j = int(np.count_nonzero(self._m[:, column] == 0)) - 1
+            i = column
+        else:
+            if not isinstance(command, Place):
+                raise Illegal()
+            j, i = command.j, command.i
+            if not (0 <= j < self.game.rows and 0 <= i < self.game.cols):
+                raise Illegal()
+            if self._m[j, i] != 0:
+                raise Illegal()
+
+        m = self._m.copy()
+        m[j, i] = {Player.ONE: 1, Player.TWO: -1}[self.player]
+        return State(self.game, m, other_player(self.player), last=j * self.game.cols + i)
+
+
+TICTACTOE = Game(3, 3, 3, name="tictactoe")
+CONNECT4 = Game(6, 7, 4, gravity=True, name="connect4")
+CONNECT5 = Game(8, 9, 5, gravity=True, name="connect5")
+GOMOKU = Game(15, 15, 5, name="gomoku")
+
+GAMES: Dict[str, Game] = {
+    game.name: game for game in (TICTACTOE, CONNECT4, CONNECT5, GOMOKU)
+}
@@ -1,9 +1,12 @@
 import time
-from typing import Optional, List, Protocol, Any, Dict, TypeVar, Generic
+from typing import Optional, List, Protocol, Any, Dict, TypeVar, Generic, Tuple, Hashable
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from math import sqrt, log
 import random
 
 from .common import Result, Player, other_player
+from .rng import RNG
 
 Command = Any
 
@@ -23,6 +26,32 @@ class StateProtocol(Protocol):
     commands: List
 
 
+def distinct_commands(state: StateProtocol) -> List[Command]:
+    """
+    One command from each group of commands that lead to mirror images
+    of each other.
+
+    States can optionally provide a `symmetries()` method, returning a
+    command mapping for each symmetry of the game that leaves the current
+    board unchanged. Games that don't have one just get all their commands.
+    """
+    symmetries: List[Dict[Command, Command]] = getattr(
+        state, "symmetries", lambda: []
+    )()
+    if not symmetries:
+        return state.commands
+
+    seen = set()
+    distinct = []
+    for command in state.commands:
+        if command in seen:
+            continue
+        distinct.append(command)
+        seen.add(command)
+        seen.update(mapping[command] for mapping in symmetries)
+    return distinct
+
+
 StateType = TypeVar("StateType", bound=StateProtocol)
 
 
@@ -30,16 +59,181 @@ class MCTSException(Exception):
     pass
 
 
+@dataclass(frozen=True)
+class Report:
+    """
+    A snapshot of what the search currently thinks, cheap enough to poll
+    while the search is still running.
+    """
+
+    command: Optional[Command]  # None until the root has any children
+    playouts: int  # at the root
+    visits: int  # through `command`
+    share: float  # visits / playouts
+    win_rate: float  # for the player making `command`
+    low: float  # 95% Wilson score interval on win_rate
+    high: float
+    line: List[Command] = field(default_factory=list)  # starts with `command`
+
+    def __json__(self) -> Dict[str, Any]:
+        # commands go out through their own __json__, with the same i/j
+        # or column fields as everywhere else
+        return {
+            "command": self.command,
+            "playouts": self.playouts,
+            "visits": self.visits,
+            "share": self.share,
+            "win_rate": self.win_rate,
+            "low": self.low,
+            "high": self.high,
+            "line": list(self.line),
+        }
+
+
+def wilson(wins: float, visits: int, z: float = 1.96) -> Tuple[float, float]:
+    """
+    Wilson score interval for a win rate. Unlike the textbook
+    p ± z * sqrt(p(1-p)/n) it doesn't collapse to a single point when
+    every playout so far has been a win (or a loss).
+    """
+    if visits == 0:
+        return 0.0, 1.0
+    p = wins / visits
+    z2 = z * z
+    centre = (p + z2 / (2 * visits)) / (1 + z2 / visits)
+    spread = z * sqrt(p * (1 - p) / visits + z2 / (4 * visits * visits)) / (1 + z2 / visits)
+    return max(centre - spread, 0.0), min(centre + spread, 1.0)
+
+
+def _most_visited(node: "Node") -> Optional[Tuple[Command, "Node", int, float]]:
+    """
+    (command, child, playouts, wins) for the most visited child.
+
+    We copy the children and their counts before looking at them, so this
+    is safe to call while another thread is still searching; the numbers
+    may just be a playout or two out of date.
+    """
+    best = None
+    for command, child in list(node.children.items()):
+        playouts, wins = child.playouts, child.wins
+        if best is None or playouts > best[2]:
+            best = (command, child, playouts, wins)
+    return best
+
+
+class Codec(Protocol):
+    """
+    Turns states into compact, hashable keys and back again. See
+    common.BoardCodec. Keys are typed as Any, because each codec picks
+    its own (BoardCodec uses ints).
+    """
+
+    def encode(self, state: Any) -> Any:
+        ...
+
+    def decode(self, key: Any) -> Any:
+        ...
+
+
+class CachedCodec:
+    """
+    Wraps a codec with an LRU cache of decoded states. The nodes near
+    the root get decoded over and over, so they stay in the cache, and
+    every state we encode goes in too, since the new leaf is about to be
+    played out.
+    """
+
+    def __init__(self, codec: Codec, size: int = 1024) -> None:
+        self.codec = codec
+        self.size = size
+        self.cache: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def _remember(self, key: Hashable, state: Any) -> None:
+        self.cache[key] = state
+        if len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+
+    def encode(self, state: Any) -> Hashable:
+        key = self.codec.encode(state)
+        self._remember(key, state)
+        return key
+
+    def decode(self, key: Hashable) -> Any:
+        state = self.cache.get(key)
+        if state is None:
+            state = self.codec.decode(key)
+        else:
+            self.cache.move_to_end(key)
+        self._remember(key, state)
+        return state
+
+
 class Node(Generic[StateType]):
 
-    "State is immutable, nodes are not"
+    """
+    State is immutable, nodes are not
+
+    With `symmetric` set, moves that lead to mirror images of each other
+    share a single child, so the statistics for all of them are gathered
+    in one place. The tree itself always stays in the real orientation,
+    so any command we report is a legal command for the real state.
+
+    With a `codec`, the node (and every node below it) only keeps the
+    encoded key for its state, and rebuilds the state when it's needed,
+    which is only when the node is expanded. Selection and backprop
+    only look at the counts, the player and the number of commands,
+    which the node keeps.
+    """
 
-    def __init__(self, state: StateType) -> None:
-        self.state = state
+    __slots__ = (
+        "_state",
+        "key",
+        "codec",
+        "player",
+        "symmetric",
+        "n_commands",
+        "children",
+        "untried",
+        "playouts",
+        "wins",
+    )
+
+    def __init__(
+        self, state: StateType, symmetric: bool = True, codec: Optional[Codec] = None
+    ) -> None:
+        self.codec = codec
+        if codec is None:
+            self._state: Optional[StateType] = state
+            self.key: Optional[Hashable] = None
+        else:
+            self._state = None
+            self.key = codec.encode(state)
+        self.player = state.player
+        self.symmetric = symmetric
+        commands = distinct_commands(state) if symmetric else state.commands
+        self.n_commands = len(commands)
         self.children: Dict[Command, Node] = {}
+        # Commands we haven't made a child for yet. Compact nodes work
+        # these out again on their first expand, rather than keep a list.
+        self.untried: Optional[List[Command]] = (
+            list(commands) if codec is None and commands else None
+        )
         self.playouts = 0
         self.wins = 0.0
 
+    @property
+    def state(self) -> StateType:
+        if self._state is not None:
+            return self._state
+        assert self.codec is not None
+        return self.codec.decode(self.key)
+
+    @property
+    def commands(self) -> List[Command]:
+        "The commands we search, one per group of mirror images if symmetric"
+        state = self.state
+        return distinct_commands(state) if self.symmetric else state.commands
+
     def __repr__(self) -> str:
         return f"Node{type(self.state)}(playouts={self.playouts}, ratio={round(self.ratio,3)})"
 
@@ -47,7 +241,7 @@ class Node(Generic[StateType]):
     def is_leaf(self) -> bool:
         "'leaf' is any node that has a potential child from which no playout has been run."
 
-        if len(self.children) < len(self.state.commands):
+        if len(self.children) < self.n_commands:
             return True
 
         # We always run a playout when we create a new node.
@@ -75,7 +269,7 @@ class Node(Generic[StateType]):
         """
         if self.is_leaf:
             return [self]
-        if len(self.state.commands) == 0:
+        if self.n_commands == 0:
             # This is a terminal state
             return [self]
 
@@ -85,26 +279,45 @@ class Node(Generic[StateType]):
 
         return [self] + highest_scoring_child.select()
 
-    def expand(self) -> "Node":
+    def expand(self, rng: RNG = random) -> "Node":
         "create a new child state from this node"
+        return self.expand_with_state(rng)[0]
 
-        if self.state.result != Result.INPROGRESS:
-            print(self.state)
-        assert self.state.result == Result.INPROGRESS
-        assert len(self.state.commands) > 0
-        assert self.is_leaf
-        assert len(self.children) < len(self.state.commands)
-
-        # pick a command that hasn't been used already
-        available = list(set(self.state.commands) - set(self.children.keys()))
-
-        command = random.choice(available)
+    def expand_with_state(self, rng: RNG = random) -> Tuple["Node", StateProtocol]:
+        """
+        Like expand, but also hands back the child's state, so a node with
+        a codec doesn't have to decode the state it has just built.
+        """
 
-        child: Node = Node(state=self.state.apply(command))
+        state = self.state
+        if state.result != Result.INPROGRESS:
+            print(state)
+        assert state.result == Result.INPROGRESS
+        assert self.n_commands > 0
+        assert self.is_leaf
+        assert len(self.children) < self.n_commands
+
+        if self.untried is None:
+            commands = distinct_commands(state) if self.symmetric else state.commands
+            self.untried = [c for c in commands if c not in self.children]
+
+        # pick a command that hasn't been used already, swapping it to
+        # the end so it can be removed in constant time
+        untried = self.untried
+        index = rng.randrange(len(untried))
+        untried[index], untried[-1] = untried[-1], untried[index]
+        command = untried.pop()
+        if not untried:
+            self.untried = None
+
+        child_state = state.apply(command)
+        child: Node = Node(
+            state=child_state, symmetric=self.symmetric, codec=self.codec
+        )
 
         self.children[command] = child
 
-        return child
+        return child, child_state
 
     def best(self) -> Command:
         """
@@ -123,6 +336,41 @@ class Node(Generic[StateType]):
         else:
             return []
     
+    def report(self, depth: int = 8) -> Report:
+        """
+        What the search thinks right now: the best command, how much of
+        the search went into it, how good it looks, and the principal
+        variation, at most `depth` commands long.
+        """
+        playouts = self.playouts
+        best = _most_visited(self)
+        if best is None or playouts == 0:
+            return Report(None, playouts, 0, 0.0, 0.0, 0.0, 1.0)
+
+        command, child, visits, wins = best
+        win_rate = wins / visits if visits else 0.0
+        low, high = wilson(wins, visits)
+
+        line = [command]
+        node = child
+        while len(line) < depth:
+            step = _most_visited(node)
+            if step is None:
+                break
+            line.append(step[0])
+            node = step[1]
+
+        return Report(
+            command,
+            playouts,
+            visits,
+            min(visits / playouts, 1.0),
+            win_rate,
+            low,
+            high,
+            line,
+        )
+
     def best_line2(self)->List["Node"]:
         if len(self.children):
             best=self.best()
@@ -156,7 +404,7 @@ def update_node(node: Node, result: Result) -> None:
     assert result in (Result.PLAYER1, Result.PLAYER2, Result.DRAW)
 
     # the player who just played the move that got us to this state
-    player = other_player(node.state.player)
+    player = other_player(node.player)
 
     if result == Result.PLAYER1 and player == Player.ONE:
         node.wins += 1
@@ -175,20 +423,24 @@ def backprop(path: List[Node], result: Result) -> None:
         update_node(node, result)
 
 
-def playout(node) -> Result:
-    state = node.state
+def playout(node, rng: RNG = random) -> Result:
+    return rollout(node.state, rng)
+
+
+def rollout(state: StateProtocol, rng: RNG = random) -> Result:
+    "Play random commands from `state` until the game ends"
     while state.result == Result.INPROGRESS:
-        command = random.choice(state.commands)
+        command = rng.choice(state.commands)
         state = state.apply(command)
     return state.result
 
 
-def expand(path: List[Node]) -> List[Node]:
+def expand(path: List[Node], rng: RNG = random) -> List[Node]:
     "Expand if possible, modify path to include new node"
     leaf = path[-1]
 
-    if leaf.state.commands:
-        path.append(leaf.expand())
+    if leaf.n_commands:
+        path.append(leaf.expand(rng))
     return path
 
 
@@ -196,9 +448,21 @@ def select(node: Node) -> List[Node]:
     return node.select()
 
 
-def mcts(root: Node) -> None:
-    assert root.state.result == Result.INPROGRESS
+def mcts(root: Node, rng: RNG = random) -> None:
+    """
+    One round of select, expand, playout and backprop. Pass each search
+    its own `rng` (see rng.py) to make it reproducible; by default we
+    use the global `random` module.
+    """
+    # a node has commands exactly when its game is still in progress,
+    # and checking this way doesn't need the (possibly encoded) state
+    assert root.n_commands > 0
     path = select(root)
-    path = expand(path)
-    result = playout(path[-1])
+    leaf = path[-1]
+    if leaf.n_commands:
+        child, state = leaf.expand_with_state(rng)
+        path.append(child)
+    else:
+        state = leaf.state
+    result = rollout(state, rng)
     backprop(path, result)
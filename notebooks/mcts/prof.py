@@ -6,7 +6,7 @@ from typing import Any
 from .node import Node,mcts
 from .common import Result, Player
 from .import connect4
-import random
+from .rng import RNG, make_rng
 Command=Any
 def apply_command(node: Node, command: Any) -> Node:
     if command in node.children:
@@ -15,27 +15,27 @@ def apply_command(node: Node, command: Any) -> Node:
         return Node(node.state.apply(command))
 
 
-def pick_move(root: Node, seconds: float) -> Command:
+def pick_move(root: Node, seconds: float, rng: RNG) -> Command:
     end = time.time() + seconds
     while time.time() < end:
-        mcts(root)
+        mcts(root, rng)
         return root.best()
 
-def play():
+def play(rng: RNG):
 
     node = Node(connect4.State())
     while node.state.result == Result.INPROGRESS:
-        move = pick_move(node, 1)
+        move = pick_move(node, 1, rng)
         node = apply_command(node, move)
     print(f"GAME OVER, result is {node.state.result}")
 
 if __name__ == "__main__":
-    random.seed(12345)
+    rng = make_rng(12345)
     pr = cProfile.Profile()
     pr.enable()
     
     for i in range(10):
-        play()
+        play(rng)
     pr.disable()
     s = io.StringIO()
     sortby = SortKey.CUMULATIVE
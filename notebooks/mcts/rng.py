@@ -0,0 +1,71 @@
+"""
+    Random number streams for searches.
+
+    The search only ever needs `randrange(n)` and `choice(seq)`, so any
+    `random.Random` instance will do, as will the `random` module itself,
+    which is what you get if you don't pass anything. Giving each search
+    its own stream keeps it reproducible even when several run at once.
+"""
+import random
+from typing import List, Optional, Protocol, Sequence, TypeVar, Union
+
+import numpy as np
+
+T = TypeVar("T")
+
+Seed = Union[None, int, np.random.SeedSequence]
+
+
+class RNG(Protocol):
+    def randrange(self, n: int) -> int:
+        ...
+
+    def choice(self, seq: Sequence[T]) -> T:
+        ...
+
+
+class BlockRNG:
+    """
+    Backed by a NumPy Generator, drawing uniform floats a block at a
+    time. It runs at about the same speed as random.Random (the search
+    makes one Python call per number either way, which is what costs),
+    so it's only worth using if you want NumPy's generators.
+    """
+
+    def __init__(self, seed: Seed = None, block_size: int = 4096) -> None:
+        self.generator = np.random.default_rng(seed)
+        self.block_size = block_size
+        self._block: List[float] = []
+        self._index = 0
+
+    def random(self) -> float:
+        if self._index == len(self._block):
+            self._block = self.generator.random(self.block_size).tolist()
+            self._index = 0
+        value = self._block[self._index]
+        self._index += 1
+        return value
+
+    def randrange(self, n: int) -> int:
+        return int(self.random() * n)
+
+    def choice(self, seq: Sequence[T]) -> T:
+        return seq[int(self.random() * len(seq))]
+
+
+def make_rng(seed: Seed = None, numpy: bool = False) -> RNG:
+    "A single stream: a random.Random, or a BlockRNG with `numpy`"
+    if numpy:
+        return BlockRNG(seed)
+    if isinstance(seed, np.random.SeedSequence):
+        return random.Random(int(seed.generate_state(1, np.uint64)[0]))
+    return random.Random(seed)
+
+
+def spawn(seed: Optional[int], count: int, numpy: bool = False) -> List[RNG]:
+    """
+    `count` independent streams derived from one seed, e.g. one per thread
+    or worker process. The same seed always gives the same streams.
+    """
+    children = np.random.SeedSequence(seed).spawn(count)
+    return [make_rng(child, numpy) for child in children]
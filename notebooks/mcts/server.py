@@ -0,0 +1,14 @@
+"""
+    Run the web server with
+
+        python -m mcts.server
+"""
+import uvicorn
+
+
+def main() -> None:
+    uvicorn.run("mcts.api:app", host="0.0.0.0", port=8000)
+
+
+if __name__ == "__main__":
+    main()
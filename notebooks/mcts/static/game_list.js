@@ -20,6 +20,10 @@ Ractive.components.GameList = Ractive.extend({
    Play Connect4
 </button>
 
+<button class="button is-info is-small is-outlined is-rounded" on-click="ws.send('new_game','gomoku')">
+   Play Gomoku
+</button>
+
    
        
 `
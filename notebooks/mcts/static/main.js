@@ -44,7 +44,7 @@ const MainScreen = Ractive.extend({
                                 {{/if}}
                             </h4>
                         
-                            {{#if current_game.name=="tictactoe"}}
+                            {{#if (current_game.name=="tictactoe") || (current_game.name=="gomoku")}}
                                 <TicTacToeBoard 
                                     ws={{ws}}
                                     game={{current_game}} 
@@ -50,13 +50,13 @@ Ractive.components.TicTacToeBoard = Ractive.extend({
                         <g transform="translate({{i*(300/game.size)}},{{j*300/game.size}})">
                             {{#if (game.player=="ONE") & (game.result=="INPROGRESS")}}
                                 <rect 
-                                    on-click="ws.send('tictactoe_move', j, i)"
-                                    x="5"  y="5" rx="3" ry="3" width="{{270/game.size}}"  height="{{270/game.size}}" 
+                                    on-click="ws.send(game.move, j, i)"
+                                    x="{{15/game.size}}"  y="{{15/game.size}}" rx="3" ry="3" width="{{270/game.size}}"  height="{{270/game.size}}" 
                                     class="square   highlighted {{cell}}" >
                                 </rect>
                             {{else}}
                                 <rect  
-                                    x="5"  y="5" rx="3" ry="3" width="{{270/game.size}}"  height="{{270/game.size}}" 
+                                    x="{{15/game.size}}"  y="{{15/game.size}}" rx="3" ry="3" width="{{270/game.size}}"  height="{{270/game.size}}" 
                                     class="square {{cell}}  " >
                                 </rect>
                             {{/if}}
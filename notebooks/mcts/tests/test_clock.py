@@ -0,0 +1,166 @@
+import pytest
+
+from .. import clock as clock_module
+from .. import connect4, tictactoe
+from ..clock import Clock
+from ..node import Node
+
+# every fake playout takes this long
+STEP = 0.001
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(clock_module, "time", fake)
+    return fake
+
+
+def fake_search(monkeypatch, fake_time, policy):
+    """
+    Replace the search with one where each playout takes STEP seconds
+    and goes to the root child `policy(playout number)`, so the visit
+    counts the clock sees are exactly what we chose.
+    """
+
+    def mcts(root, rng):
+        fake_time.now += STEP
+        commands = root.commands
+        command = commands[policy(root.playouts) % len(commands)]
+        child = root.children.get(command)
+        if child is None:
+            child = root.children[command] = Node(root.state.apply(command))
+        child.playouts += 1
+        root.playouts += 1
+
+    monkeypatch.setattr(clock_module, "mcts", mcts)
+
+
+def forced_node() -> Node:
+    "A tictactoe position with only one empty cell left"
+    state = tictactoe.State()
+    for j, i in ((0, 0), (0, 1), (0, 2), (1, 1), (1, 0), (1, 2), (2, 1), (2, 0)):
+        state = state.apply(tictactoe.Command(j, i))
+    return Node(state)
+
+
+def make_clock(**kwargs) -> Clock:
+    kwargs = {"total": 10.0, "moves": 10, "branching": 7, "fixed": 1.5, **kwargs}
+    return Clock(**kwargs)
+
+
+def test_allocation_is_an_even_share_scaled_by_branching():
+    clock = make_clock()
+    assert clock.allocate(Node(connect4.State(), symmetric=False)) == pytest.approx(1.0)
+    # 3 commands against a typical 7 gets the lowest weight, a half share
+    assert clock.allocate(Node(tictactoe.State())) == pytest.approx(0.5)
+
+
+def test_allocation_is_capped_at_half_of_what_is_left():
+    clock = make_clock(moves=1)
+    assert clock.allocate(Node(connect4.State(), symmetric=False)) == pytest.approx(5.0)
+
+
+def test_allocation_never_drops_below_the_minimum():
+    clock = make_clock(total=0.01)
+    node = Node(connect4.State(), symmetric=False)
+    assert clock.allocate(node) == clock.minimum
+
+
+def test_forced_moves_are_answered_straight_away(monkeypatch, fake_time):
+    fake_search(monkeypatch, fake_time, lambda n: 0)
+    clock = make_clock()
+    node = forced_node()
+
+    assert clock.allocate(node) == 0.0
+    elapsed = clock.search(node)
+
+    assert node.playouts == 1
+    assert elapsed == pytest.approx(STEP)
+    assert clock.saved == pytest.approx(1.5 - STEP)
+    assert clock.under_allocation == pytest.approx(-STEP)
+
+
+def test_stops_once_the_leader_cannot_be_caught(monkeypatch, fake_time):
+    fake_search(monkeypatch, fake_time, lambda n: 0)
+    clock = make_clock()
+    node = Node(connect4.State(), symmetric=False)
+
+    elapsed = clock.search(node)
+
+    # with every playout on one child, it's out of reach well before
+    # the 1 second allocation is up
+    assert elapsed < 0.6
+    assert clock.under_allocation == pytest.approx(1.0 - elapsed)
+
+
+def test_thinks_longer_once_when_the_top_two_are_close(monkeypatch, fake_time):
+    fake_search(monkeypatch, fake_time, lambda n: n % 2)
+    clock = make_clock()
+    node = Node(connect4.State(), symmetric=False)
+
+    elapsed = clock.search(node)
+
+    # 1 second, plus one extension of half that, and no second extension
+    assert elapsed == pytest.approx(1.5, abs=clock.check_every + STEP)
+    assert clock.under_allocation == pytest.approx(1.0 - elapsed)
+
+
+def test_no_extension_when_the_leader_is_clear(monkeypatch, fake_time):
+    # three quarters of the playouts go to one child
+    fake_search(monkeypatch, fake_time, lambda n: int(n % 4 == 3))
+    clock = make_clock(extension=10.0)
+    node = Node(connect4.State(), symmetric=False)
+
+    elapsed = clock.search(node)
+
+    assert elapsed <= 1.0 + clock.check_every + STEP
+
+
+def test_accounting_over_several_moves():
+    clock = make_clock()
+    clock.spend(budget=1.0, elapsed=0.25)
+    clock.spend(budget=1.0, elapsed=1.5)
+
+    assert clock.moves_made == 2
+    assert clock.used == pytest.approx(1.75)
+    assert clock.remaining == pytest.approx(8.25)
+    assert clock.saved == pytest.approx(2 * 1.5 - 1.75)
+    assert clock.under_allocation == pytest.approx(0.75 - 0.5)
+
+
+def test_time_spent_elsewhere_is_charged_to_the_move(monkeypatch, fake_time):
+    fake_search(monkeypatch, fake_time, lambda n: n % 2)
+    clock = make_clock()
+    node = Node(connect4.State(), symmetric=False)
+
+    # e.g. a distributed search that failed after using up the whole budget
+    elapsed = clock.search(node, budget=1.0, spent=1.2)
+
+    # one playout, so the root has a child to pick
+    assert node.playouts == 1
+    assert node.children
+    assert elapsed == pytest.approx(1.2 + STEP)
+    assert clock.used == pytest.approx(1.2 + STEP)
+    assert clock.saved == pytest.approx(1.5 - 1.2 - STEP)
+    assert clock.under_allocation == pytest.approx(1.0 - 1.2 - STEP)
+
+
+def test_part_of_the_budget_spent_elsewhere(monkeypatch, fake_time):
+    fake_search(monkeypatch, fake_time, lambda n: n % 2)
+    clock = make_clock(extension=0)
+    node = Node(connect4.State(), symmetric=False)
+
+    elapsed = clock.search(node, budget=1.0, spent=0.4)
+
+    # only the rest of the budget gets searched here
+    assert elapsed == pytest.approx(1.0, abs=clock.check_every + STEP)
+    assert clock.moves_made == 1
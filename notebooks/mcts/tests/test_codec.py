@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from .. import connect4, mnk, tictactoe
+from ..common import Result
+from ..node import CachedCodec, Node, mcts
+
+GAMES = {
+    "tictactoe": (tictactoe.State, tictactoe.CODEC),
+    "connect4": (connect4.State, connect4.CODEC),
+    **{
+        f"mnk:{name}": (lambda game=game: mnk.State(game), game.codec)
+        for name, game in mnk.GAMES.items()
+    },
+}
+
+
+def assert_same(a, b):
+    assert type(a) is type(b)
+    assert a._m.dtype == b._m.dtype
+    assert (a._m == b._m).all()
+    assert a.player == b.player
+    assert a.result == b.result
+    assert a.commands == b.commands
+
+
+@pytest.mark.parametrize("name", GAMES)
+@pytest.mark.parametrize("seed", range(5))
+def test_round_trip(name, seed):
+    make_state, codec = GAMES[name]
+    rng = random.Random(seed)
+    state = make_state()
+    keys = set()
+    while True:
+        key = codec.encode(state)
+        assert isinstance(key, int)
+        assert key not in keys
+        keys.add(key)
+        assert_same(codec.decode(key), state)
+        if state.result != Result.INPROGRESS:
+            break
+        state = state.apply(rng.choice(state.commands))
+
+
+def test_cached_codec_evicts_least_recently_used():
+    codec = CachedCodec(connect4.CODEC, size=2)
+    states = [connect4.State()]
+    for column in range(3):
+        states.append(states[-1].apply(connect4.Command(column)))
+    keys = [codec.encode(state) for state in states[:3]]
+    assert list(codec.cache) == keys[1:]
+
+    # touching keys[1] makes keys[2] the oldest
+    assert codec.decode(keys[1]) is states[1]
+    codec.encode(states[3])
+    assert keys[2] not in codec.cache
+    assert_same(codec.decode(keys[2]), states[2])
+
+
+@pytest.mark.parametrize(
+    "codec", [connect4.CODEC, CachedCodec(connect4.CODEC, 16)], ids=["plain", "cached"]
+)
+def test_compact_search_matches_plain(codec):
+    plain = Node(connect4.State())
+    compact = Node(connect4.State(), codec=codec)
+    for root in (plain, compact):
+        rng = random.Random(7)
+        for _ in range(300):
+            mcts(root, rng)
+    assert plain.report() == compact.report()
+    assert compact._state is None
@@ -0,0 +1,43 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from .. import connect4, tictactoe
+from ..common import Illegal
+
+
+def test_commands_are_interned():
+    assert tictactoe.Command(1, 2) is tictactoe.Command(1, 2)
+    assert tictactoe.Command(np.int64(1), np.int64(2)) is tictactoe.Command(1, 2)
+    assert connect4.Command(3) is connect4.Command(np.int64(3))
+
+
+def test_commands_survive_pickling():
+    for command in (tictactoe.Command(2, 0), connect4.Command(5)):
+        assert pickle.loads(pickle.dumps(command)) is command
+
+
+@pytest.mark.parametrize(
+    "command, name",
+    [(tictactoe.Command(0, 0), "i"), (tictactoe.Command(0, 0), "j"), (connect4.Command(1), "column")],
+)
+def test_shared_commands_cant_be_changed(command, name):
+    before = getattr(command, name)
+    with pytest.raises(AttributeError):
+        setattr(command, name, 2)
+    with pytest.raises(AttributeError):
+        delattr(command, name)
+    assert getattr(command, name) == before
+
+
+@pytest.mark.parametrize("coords", [(-1, 0), (0, 3), (1.0, 1), ("1", 1), (None, 0)])
+def test_bad_tictactoe_commands_are_illegal(coords):
+    with pytest.raises(Illegal):
+        tictactoe.Command(*coords)
+
+
+@pytest.mark.parametrize("column", [-1, 7, 2.0, "2", None])
+def test_bad_connect4_commands_are_illegal(column):
+    with pytest.raises(Illegal):
+        connect4.Command(column)
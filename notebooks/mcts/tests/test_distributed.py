@@ -0,0 +1,211 @@
+import json
+import threading
+import time
+from concurrent.futures import Future
+from typing import List
+
+import pytest
+
+from .. import connect4, mnk
+from ..distributed import (
+    Coordinator,
+    LoopbackTransport,
+    NoResults,
+    SearchRequest,
+    SearchResult,
+    Worker,
+    loopback,
+)
+from ..node import Node
+
+
+class BrokenTransport:
+    "Answers every request with an exception"
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def send(self, request: bytes) -> "Future[bytes]":
+        future: "Future[bytes]" = Future()
+        future.set_exception(ConnectionError("host unreachable"))
+        return future
+
+    def cancel(self, request_id: str) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class HangingTransport:
+    """
+    Never answers. With `running` set the request looks like it has
+    started, so the coordinator can't just drop it from a queue.
+    """
+
+    def __init__(self, name: str, running: bool = False) -> None:
+        self.name = name
+        self.running = running
+        self.cancelled: List[str] = []
+
+    def send(self, request: bytes) -> "Future[bytes]":
+        future: "Future[bytes]" = Future()
+        if self.running:
+            future.set_running_or_notify_cancel()
+        return future
+
+    def cancel(self, request_id: str) -> None:
+        self.cancelled.append(request_id)
+
+    def close(self) -> None:
+        pass
+
+
+def children(root):
+    return {repr(command): (child.playouts, child.wins) for command, child in root.children.items()}
+
+
+def test_results_are_merged_into_the_root():
+    root = Node(connect4.State())
+    with loopback(3, seed=1) as coordinator:
+        merged = coordinator.search(root, "connect4", 5.0, playouts=100)
+    assert merged.workers == ["loopback-0", "loopback-1", "loopback-2"]
+    assert merged.timeouts == [] and merged.failures == {}
+    assert merged.playouts == root.playouts == 300
+    assert sum(child.playouts for child in root.children.values()) == 300
+    assert root.report().command in root.state.commands
+
+
+def test_seeded_searches_are_reproducible():
+    def search():
+        root = Node(connect4.State())
+        with loopback(2, seed=5) as coordinator:
+            coordinator.search(root, "connect4", 5.0, playouts=100)
+            coordinator.search(root, "connect4", 5.0, playouts=100)
+        return children(root)
+
+    assert search() == search()
+
+
+def test_slow_workers_time_out():
+    # the grace period is only there so a loaded machine can't make the
+    # fast worker miss it too
+    with Coordinator(
+        [LoopbackTransport(Worker("fast")), HangingTransport("slow")], grace=1.0
+    ) as coordinator:
+        root = Node(connect4.State())
+        merged = coordinator.search(root, "connect4", 0.1)
+    assert merged.workers == ["fast"]
+    assert merged.timeouts == ["slow"]
+    assert root.playouts == merged.playouts > 0
+
+
+def test_failures_are_left_out():
+    with Coordinator(
+        [
+            LoopbackTransport(Worker("good")),
+            LoopbackTransport(Worker("no-codecs", codecs={})),
+            BrokenTransport("broken"),
+        ],
+        grace=5.0,
+    ) as coordinator:
+        root = Node(connect4.State())
+        merged = coordinator.search(root, "connect4", 0.1)
+    assert merged.workers == ["good"]
+    assert set(merged.failures) == {"no-codecs", "broken"}
+    assert "unknown game" in merged.failures["no-codecs"]
+
+
+def test_no_results():
+    coordinator = Coordinator([BrokenTransport("a"), HangingTransport("b")], grace=0.05)
+    root = Node(connect4.State())
+    with pytest.raises(NoResults):
+        coordinator.search(root, "connect4", 0.1)
+    assert root.playouts == 0
+    assert root.children == {}
+
+
+class RecordingWorker(Worker):
+    "Remembers which requests it was asked to run"
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.handled: List[str] = []
+
+    def handle(self, request: SearchRequest) -> SearchResult:
+        self.handled.append(request.id)
+        return super().handle(request)
+
+
+def encoded(state) -> str:
+    return format(connect4.CODEC.encode(state), "x")
+
+
+def test_queued_search_is_dropped_on_timeout():
+    worker = RecordingWorker("w")
+    with LoopbackTransport(worker) as transport:
+        # keep the worker's only thread busy, so our search can't start
+        release = threading.Event()
+        transport.executor.submit(release.wait)
+        with pytest.raises(NoResults):
+            Coordinator([transport], grace=0.0).search(Node(connect4.State()), "connect4", 0.05)
+        release.set()
+        # wait for anything still queued behind the busy job
+        transport.executor.submit(lambda: None).result()
+    assert worker.handled == []
+
+
+def test_running_search_is_cancelled_on_timeout():
+    transport = HangingTransport("w", running=True)
+    with pytest.raises(NoResults):
+        Coordinator([transport], grace=0.0).search(Node(connect4.State()), "connect4", 0.05)
+    assert len(transport.cancelled) == 1
+
+
+def wait_until_running(worker: Worker, request_id: str) -> None:
+    deadline = time.monotonic() + 10.0
+    while request_id not in worker._running:
+        assert time.monotonic() < deadline, "the search never started"
+        time.sleep(0.01)
+
+
+def test_worker_stops_a_cancelled_search():
+    with LoopbackTransport(Worker("w")) as transport:
+        request = SearchRequest("long", "connect4", encoded(connect4.State()), 60.0, 1)
+        future = transport.send(request.to_wire())
+        wait_until_running(transport.worker, "long")
+        transport.cancel("long")
+        # long before the search's own 60 seconds are up
+        result = SearchResult.from_wire(future.result(timeout=30.0))
+    assert result.error is None
+    assert transport.worker._cancelled == set()
+
+
+def test_closing_a_transport_stops_its_search():
+    transport = LoopbackTransport(Worker("w"))
+    request = SearchRequest("long", "connect4", encoded(connect4.State()), 60.0, 1)
+    running = transport.send(request.to_wire())
+    queued = transport.send(request.to_wire())
+    wait_until_running(transport.worker, "long")
+
+    transport.close()
+
+    assert running.done() and running.exception() is None
+    assert queued.cancelled()
+    assert not any(
+        thread.name.startswith("worker-w") for thread in threading.enumerate()
+    )
+
+
+def test_keys_go_over_the_wire_as_hex():
+    state = mnk.State(mnk.GOMOKU).apply(mnk.GOMOKU.command(14, 14))
+    key = mnk.GOMOKU.codec.encode(state)
+    assert key.bit_length() > 64
+
+    request = SearchRequest("id", "mnk:gomoku", format(key, "x"), 60.0, 1, playouts=5)
+    wire = json.loads(request.to_wire())
+    assert isinstance(wire["key"], str)
+
+    result = SearchResult.from_wire(Worker("w").handle_wire(request.to_wire()))
+    assert result.error is None
+    assert result.playouts == 5
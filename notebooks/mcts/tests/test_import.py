@@ -0,0 +1,29 @@
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+from ..bench import CORE_MODULES, WEB_MODULES
+
+# the directory the mcts package lives in
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+ENGINE_MODULES = ("mcts",) + CORE_MODULES + ("mcts.rng", "mcts.clock", "mcts.distributed")
+
+
+@pytest.mark.parametrize("module", ENGINE_MODULES)
+def test_engine_does_not_import_the_web_stack(module):
+    script = (
+        "import sys\n"
+        f"import {module}\n"
+        f"print(*[m for m in {WEB_MODULES!r} if m in sys.modules])\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.split() == []
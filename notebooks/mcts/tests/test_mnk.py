@@ -0,0 +1,140 @@
+import random
+
+import pytest
+
+from .. import connect4, mnk, tictactoe
+from ..common import GameOver, Illegal, Player, Result
+
+
+def place_coords(commands):
+    return [(command.j, command.i) for command in commands]
+
+
+def drop_coords(commands):
+    return [command.column for command in commands]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_tictactoe_matches_original(seed):
+    rng = random.Random(seed)
+    old, new = tictactoe.State(), mnk.State(mnk.TICTACTOE)
+    while True:
+        assert (old._m == new._m).all()
+        assert old.player == new.player
+        assert old.result == new.result
+        assert place_coords(old.commands) == place_coords(new.commands)
+        if old.result != Result.INPROGRESS:
+            break
+        command = rng.choice(old.commands)
+        old = old.apply(command)
+        new = new.apply(mnk.TICTACTOE.command(command.j, command.i))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_connect4_matches_original(seed):
+    rng = random.Random(seed)
+    old, new = connect4.State(), mnk.State(mnk.CONNECT4)
+    while True:
+        assert (old._m == new._m).all()
+        assert old.player == new.player
+        assert old.result == new.result
+        assert drop_coords(old.commands) == drop_coords(new.commands)
+        if old.result != Result.INPROGRESS:
+            break
+        command = rng.choice(old.commands)
+        old = old.apply(command)
+        new = new.apply(mnk.CONNECT4.command(command.column))
+
+
+def play(game, moves):
+    state = mnk.State(game)
+    for move in moves:
+        state = state.apply(game.command(*move))
+    return state
+
+
+def test_gomoku_diagonal_win():
+    # X plays down the anti-diagonal, O wastes moves along the top row
+    moves = []
+    for s in range(5):
+        moves.append((10 - s, 4 + s))
+        moves.append((0, s))
+    state = play(mnk.GOMOKU, moves[:-1])
+    assert state.result == Result.PLAYER1
+    assert state.commands == []
+
+
+def test_four_in_a_row_is_not_enough_for_gomoku():
+    moves = []
+    for i in range(4):
+        moves.append((7, i))
+        moves.append((0, i))
+    assert play(mnk.GOMOKU, moves).result == Result.INPROGRESS
+
+
+def test_whole_board_check_agrees_with_incremental():
+    rng = random.Random(1)
+    state = mnk.State(mnk.CONNECT5)
+    while state.result == Result.INPROGRESS:
+        state = state.apply(rng.choice(state.commands))
+        rebuilt = mnk.State(mnk.CONNECT5, state._m.copy(), state.player)
+        assert rebuilt.result == state.result
+
+
+def test_gravity_fills_from_the_bottom():
+    state = play(mnk.CONNECT5, [(2,), (2,), (2,)])
+    column = state._m[:, 2]
+    assert list(column[-3:]) == [1, -1, 1]
+    assert not column[:-3].any()
+
+
+def test_illegal_commands():
+    game = mnk.GOMOKU
+    with pytest.raises(Illegal):
+        game.command(-1, 0)
+    with pytest.raises(Illegal):
+        game.command(0, 15)
+    with pytest.raises(Illegal):
+        game.command(3)
+    with pytest.raises(Illegal):
+        mnk.CONNECT4.command(7)
+
+    state = play(game, [(7, 7)])
+    with pytest.raises(Illegal):
+        state.apply(game.command(7, 7))
+    with pytest.raises(Illegal):
+        state.apply(mnk.CONNECT4.command(0))
+
+
+def test_full_column_is_illegal():
+    state = play(mnk.CONNECT4, [(0,)] * 6)
+    assert 0 not in drop_coords(state.commands)
+    with pytest.raises(Illegal):
+        state.apply(mnk.CONNECT4.command(0))
+
+
+def test_no_moves_after_the_game_ends():
+    state = play(mnk.TICTACTOE, [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)])
+    assert state.result == Result.PLAYER1
+    with pytest.raises(GameOver):
+        state.apply(mnk.TICTACTOE.command(2, 2))
+
+
+def test_draw():
+    # X O X / X O O / O X X
+    moves = [(0, 0), (0, 1), (0, 2), (1, 1), (1, 0), (1, 2), (2, 1), (2, 0), (2, 2)]
+    state = play(mnk.TICTACTOE, moves)
+    assert state.result == Result.DRAW
+    assert state.player == Player.TWO
+    assert not (state._m == 0).any()
+
+
+def test_winning_lines_count():
+    # 8 lines in tictactoe, 69 in connect4
+    assert len(mnk.TICTACTOE.lines) == 8
+    assert len(mnk.CONNECT4.lines) == 69
+    assert mnk.GOMOKU.lines.shape == (572, 5)
+    assert all(
+        (lines == cell).any(axis=1).all()
+        for cell, lines in enumerate(mnk.GOMOKU.cell_lines)
+    )
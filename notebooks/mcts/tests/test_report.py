@@ -0,0 +1,89 @@
+import json
+import random
+
+import pytest
+
+from .. import connect4, mnk, tictactoe
+from ..node import Node, mcts, wilson
+
+
+def dumps(thing):
+    "What the server does with anything that has a __json__ method"
+    return json.dumps(thing, default=lambda thing: thing.__json__())
+
+
+def test_wilson_with_no_visits_knows_nothing():
+    assert wilson(0, 0) == (0.0, 1.0)
+
+
+@pytest.mark.parametrize("wins, visits", [(1, 1), (0, 1), (10, 10)])
+def test_wilson_does_not_collapse_to_a_point(wins, visits):
+    low, high = wilson(wins, visits)
+    assert 0.0 <= low < high <= 1.0
+    assert low <= wins / visits <= high
+
+
+def test_wilson_narrows_with_more_visits():
+    few = wilson(5, 10)
+    many = wilson(500, 1000)
+    assert few[0] < many[0] < 0.5 < many[1] < few[1]
+
+
+def searched(state, playouts=200, seed=0):
+    root = Node(state)
+    rng = random.Random(seed)
+    for _ in range(playouts):
+        mcts(root, rng)
+    return root
+
+
+def test_report_before_any_children():
+    report = Node(tictactoe.State()).report()
+    assert report.command is None
+    assert report.playouts == 0
+    assert (report.low, report.high) == (0.0, 1.0)
+    assert report.line == []
+    assert json.loads(dumps(report))["command"] is None
+
+
+def test_report_follows_the_most_visited_line():
+    root = searched(connect4.State())
+    report = root.report()
+
+    assert report.command is root.best()
+    assert report.line == root.best_line()[: len(report.line)]
+    assert report.playouts == root.playouts
+    assert report.visits == root.children[report.command].playouts
+    assert report.share == pytest.approx(report.visits / root.playouts)
+    assert report.low <= report.win_rate <= report.high
+
+
+@pytest.fixture(scope="module")
+def deep_root():
+    return searched(connect4.State(), playouts=500)
+
+
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_report_line_is_cut_to_depth(deep_root, depth):
+    report = deep_root.report(depth=depth)
+    assert len(report.line) == depth
+    assert report.line[0] is report.command
+
+
+@pytest.mark.parametrize(
+    "make, fields",
+    [
+        (tictactoe.State, {"i", "j"}),
+        (connect4.State, {"column"}),
+        (lambda: mnk.State(mnk.GOMOKU), {"i", "j"}),
+        (lambda: mnk.State(mnk.CONNECT4), {"column"}),
+    ],
+)
+def test_report_json_has_structured_commands(make, fields):
+    report = searched(make(), playouts=50).report()
+    data = json.loads(dumps(report))
+
+    assert set(data["command"]) == fields
+    assert data["line"][0] == data["command"]
+    for command, sent in zip(report.line, data["line"]):
+        assert sent == {field: getattr(command, field) for field in fields}
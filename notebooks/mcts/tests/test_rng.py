@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from .. import mnk
+from ..node import Node, mcts
+from ..rng import spawn
+
+
+def fingerprint(node):
+    "Enough of the tree to tell two searches apart"
+    return [node.playouts, node.wins] + [
+        (repr(command), fingerprint(child)) for command, child in node.children.items()
+    ]
+
+
+def search(rng, playouts=300):
+    root = Node(mnk.State(mnk.CONNECT4))
+    for _ in range(playouts):
+        mcts(root, rng)
+    return fingerprint(root)
+
+
+@pytest.mark.parametrize("numpy", [False, True])
+def test_seeded_searches_are_reproducible_across_threads(numpy):
+    one_at_a_time = [search(rng) for rng in spawn(12345, 4, numpy)]
+    with ThreadPoolExecutor(4) as pool:
+        in_threads = list(pool.map(search, spawn(12345, 4, numpy)))
+    assert one_at_a_time == in_threads
+
+
+@pytest.mark.parametrize("numpy", [False, True])
+def test_spawned_streams_are_independent(numpy):
+    searches = [search(rng) for rng in spawn(12345, 4, numpy)]
+    assert len(set(map(repr, searches))) == 4
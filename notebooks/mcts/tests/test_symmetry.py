@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from .. import connect4, mnk, tictactoe
+from ..node import Node, distinct_commands, mcts
+
+TICTACTOE = {
+    "tictactoe": (tictactoe.State, tictactoe.Command),
+    "mnk:tictactoe": (lambda: mnk.State(mnk.TICTACTOE), mnk.TICTACTOE.command),
+}
+
+CONNECT4 = {
+    "connect4": (connect4.State, connect4.Command),
+    "mnk:connect4": (lambda: mnk.State(mnk.CONNECT4), mnk.CONNECT4.command),
+}
+
+
+@pytest.mark.parametrize("name", TICTACTOE)
+def test_empty_tictactoe_has_three_distinct_commands(name):
+    make, _ = TICTACTOE[name]
+    # a corner, an edge and the centre
+    assert len(distinct_commands(make())) == 3
+    assert len(make().symmetries()) == 7
+
+
+@pytest.mark.parametrize("name", CONNECT4)
+def test_empty_connect4_has_four_distinct_commands(name):
+    make, command = CONNECT4[name]
+    # columns 0-3, since 4-6 are their mirror images
+    assert distinct_commands(make()) == [command(i) for i in range(4)]
+
+
+@pytest.mark.parametrize("name", TICTACTOE)
+def test_nothing_merged_on_an_asymmetric_tictactoe_board(name):
+    make, command = TICTACTOE[name]
+    state = make().apply(command(0, 0)).apply(command(0, 1))
+    assert state.symmetries() == []
+    assert distinct_commands(state) == state.commands
+
+
+@pytest.mark.parametrize("name", CONNECT4)
+def test_nothing_merged_on_an_asymmetric_connect4_board(name):
+    make, command = CONNECT4[name]
+    state = make().apply(command(0))
+    assert state.symmetries() == []
+    assert distinct_commands(state) == state.commands
+
+
+@pytest.mark.parametrize("name", TICTACTOE)
+def test_symmetric_tictactoe_board_merges_its_mirror_images(name):
+    make, command = TICTACTOE[name]
+    # the centre is fixed by every symmetry
+    state = make().apply(command(1, 1))
+    assert len(state.symmetries()) == 7
+    assert len(distinct_commands(state)) == 2
+
+
+GAMES = {
+    "tictactoe": tictactoe.State,
+    "connect4": connect4.State,
+    **{f"mnk:{name}": (lambda game=game: mnk.State(game)) for name, game in mnk.GAMES.items()},
+}
+
+
+@pytest.mark.parametrize("name", GAMES)
+@pytest.mark.parametrize("seed", range(2))
+def test_symmetric_search_only_picks_real_commands(name, seed):
+    rng = random.Random(seed)
+    root = Node(GAMES[name](), symmetric=True)
+    for _ in range(100):
+        mcts(root, rng)
+
+    assert root.best() in root.state.commands
+    state = root.state
+    line = root.best_line()
+    assert line
+    for command in line:
+        assert command in state.commands
+        state = state.apply(command)
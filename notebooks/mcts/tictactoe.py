@@ -1,12 +1,10 @@
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, List, Callable, Tuple
 import numpy as np
 import time
 from collections import Counter
 
-from dataclasses import dataclass
 
-
-from .common import Result, Player, other_player, Illegal, GameOver
+from .common import Result, Player, other_player, Illegal, GameOver, BoardCodec
 
 
 SIZE = 3
@@ -37,18 +35,81 @@ def _result(m: np.ndarray) -> Result:
     return Result.INPROGRESS
 
 
-@dataclass(frozen=True)
 class Command:
+    """
+    There is exactly one Command per cell, built when the module loads.
+    Command(j, i) hands back that shared instance, so states don't allocate
+    commands and hashing and comparison are by identity.
+    """
+
+    __slots__ = ("j", "i")
+
     j: int
     i: int
 
-    def __post_init__(self):
-        assert 0 <= self.i < SIZE, f"i must be between 0 and {SIZE-1}"
-        assert 0 <= self.j < SIZE, f"j must be between 0 and {SIZE-1}"
+    def __new__(cls, j: int, i: int) -> "Command":
+        # an explicit check, because a negative index would quietly
+        # give us some other cell
+        try:
+            if not (0 <= i < SIZE and 0 <= j < SIZE):
+                raise Illegal(f"i and j must be between 0 and {SIZE-1}")
+            return COMMANDS[j * SIZE + i]
+        except TypeError:
+            raise Illegal("i and j must be integers")
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # every state in the process shares these
+        raise AttributeError("commands can't be changed")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("commands can't be changed")
+
+    def __reduce__(self) -> Tuple:
+        return (Command, (self.j, self.i))
 
     def __repr__(self) -> str:
         return f"({self.i},{self.j})"
 
+    def __json__(self) -> Dict[str, int]:
+        return {"i": self.i, "j": self.j}
+
+
+def _intern(code: int) -> Command:
+    command = object.__new__(Command)
+    j, i = divmod(code, SIZE)
+    object.__setattr__(command, "j", j)
+    object.__setattr__(command, "i", i)
+    return command
+
+
+COMMANDS: List[Command] = [_intern(code) for code in range(SIZE * SIZE)]
+
+
+# The 7 non-trivial symmetries of the square board
+TRANSFORMS: List[Callable[[np.ndarray], np.ndarray]] = [
+    lambda m: np.rot90(m, 1),
+    lambda m: np.rot90(m, 2),
+    lambda m: np.rot90(m, 3),
+    np.fliplr,
+    np.flipud,
+    np.transpose,
+    lambda m: np.rot90(m, 2).T,
+]
+
+
+def _command_map(transform: Callable[[np.ndarray], np.ndarray]) -> Dict[Command, Command]:
+    "Where each cell ends up when the board is transformed"
+    source = transform(np.arange(SIZE * SIZE).reshape(SIZE, SIZE))
+    return {
+        COMMANDS[source]: COMMANDS[code]
+        for code, source in enumerate(source.reshape(-1).tolist())
+    }
+
+
+SYMMETRIES: List[Tuple[Callable[[np.ndarray], np.ndarray], Dict[Command, Command]]] = [
+    (transform, _command_map(transform)) for transform in TRANSFORMS
+]
+
 
 # State classes should be treated as immutable
 class State:
@@ -70,14 +131,19 @@ class State:
 
         if self.result == Result.INPROGRESS:
             self.commands = [
-                Command(j, i)
-                for j in range(SIZE)
-                for i in range(SIZE)
-                if self._m[j, i] == 0
+                COMMANDS[code] for code in np.flatnonzero(self._m == 0)
             ]
         else:
             self.commands = []
 
+    def symmetries(self) -> List[Dict[Command, Command]]:
+        "Command mappings for the symmetries that leave this board unchanged"
+        return [
+            mapping
+            for transform, mapping in SYMMETRIES
+            if (transform(self._m) == self._m).all()
+        ]
+
     def __repr__(self) -> str:
         d = {0: " ", -1: "X", 1: "O"}
         return (
@@ -101,3 +167,6 @@ class State:
         v = {Player.ONE: 1, Player.TWO: -1}[self.player]
         m[command.j, command.i] = v
         return State(m, other_player(self.player))
+
+
+CODEC = BoardCodec((SIZE, SIZE), State)